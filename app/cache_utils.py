@@ -0,0 +1,84 @@
+# app/cache_utils.py
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import List, Optional
+
+# Small on-disk LRU cache shared by all requests (keyed by repo content hash).
+# Lives in a private directory outside the repo; override with DOCGEN_CACHE_DIR.
+CACHE_DIR = os.getenv("DOCGEN_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "smart-api-docgen"))
+CACHE_FILE = "docgen_cache.db"
+CACHE_MAX_ENTRIES = 512
+CACHE_MAX_BYTES = int(os.getenv("DOCGEN_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+
+def content_hash(texts: List[str]) -> str:
+    """Stable 128-bit blake2b hash of a list of strings."""
+    h = hashlib.blake2b(digest_size=16)
+    for t in texts:
+        h.update(t.encode("utf-8", "ignore"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def _connect():
+    os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+    os.chmod(CACHE_DIR, 0o700)  # makedirs leaves an existing directory's mode alone
+    conn = sqlite3.connect(os.path.join(CACHE_DIR, CACHE_FILE), timeout=10)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS cache ("
+        "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+    )
+    return conn
+
+
+def cache_get(key: str) -> Optional[bytes]:
+    """Return the cached bytes for key (and mark it recently used), or None."""
+    try:
+        with closing(_connect()) as conn, conn:
+            row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Cache read failed for {key}: {e}")
+        return None
+
+
+def cache_set(key: str, value: bytes) -> None:
+    """
+    Store bytes under key, then evict least recently used entries until the
+    cache holds at most CACHE_MAX_ENTRIES entries and CACHE_MAX_BYTES bytes.
+    """
+    if len(value) > CACHE_MAX_BYTES:
+        return
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM ("
+                "SELECT key, ROW_NUMBER() OVER w AS n, SUM(size) OVER w AS total FROM cache "
+                "WINDOW w AS (ORDER BY accessed DESC ROWS UNBOUNDED PRECEDING)"
+                ") WHERE n > ? OR total > ?)",
+                (CACHE_MAX_ENTRIES, CACHE_MAX_BYTES),
+            )
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Cache write failed for {key}: {e}")
+
+
+def cache_get_json(key: str):
+    """JSON-decoded cache value, or None on a miss."""
+    value = cache_get(key)
+    return json.loads(value) if value is not None else None
+
+
+def cache_set_json(key: str, value) -> None:
+    cache_set(key, json.dumps(value).encode("utf-8"))
@@ -1,14 +1,63 @@
 import os
 import re
-from typing import List, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+
+try:
+    import hyperscan
+except ImportError:  # optional: falls back to the combined `re` scan
+    hyperscan = None
 
 # Add any binary extensions you want to skip
-BINARY_EXTENSIONS = [
+BINARY_EXTENSIONS = frozenset({
     ".exe", ".dll", ".so", ".bin", ".class", ".jar", ".pyc", ".pyo", ".zip", ".tar", ".gz", ".png", ".jpg", ".jpeg", ".gif"
-]
+})
+
+# Leading bytes checked for NUL to detect binary content
+BINARY_SNIFF_BYTES = 8192
+
+def get_file_extension(filename: str) -> str:
+    """Lower-cased extension of a file name or path (e.g. ".py"), or "" if none."""
+    return os.path.splitext(filename)[1].lower()
+
 
 def is_text_file(filename: str) -> bool:
-    return not any(filename.endswith(ext) for ext in BINARY_EXTENSIONS)
+    return get_file_extension(filename) not in BINARY_EXTENSIONS
+
+
+def _iter_files(root: str):
+    """Yield os.DirEntry objects for every regular file under root (no symlinks)."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except OSError as e:
+            print(f"❌ Failed to scan {directory}: {e}")
+
+
+def _read_file(file_path: str) -> Optional[Dict]:
+    """Read a single text file; returns None if it is empty, binary or unreadable."""
+    try:
+        with open(file_path, "rb") as file:
+            head = file.read(BINARY_SNIFF_BYTES)
+            # NUL bytes never appear in text files; catches binaries the extension list missed
+            if b"\x00" in head:
+                return None
+            content = (head + file.read()).decode("utf-8", "ignore")
+        # Match text-mode reads: universal newlines
+        content = content.replace("\r\n", "\n").replace("\r", "\n").strip()
+        if content:
+            return {"path": file_path, "content": content}
+    except Exception as e:
+        print(f"❌ Failed to read {file_path}: {e}")
+    return None
 
 
 def extract_code_files(repo_path: str, max_file_size_mb: int = 5) -> List[Dict]:
@@ -22,80 +71,148 @@ def extract_code_files(repo_path: str, max_file_size_mb: int = 5) -> List[Dict]:
         print(f"❌ Repo path does not exist: {repo_path}")
         return code_files
 
-    for root, _, files in os.walk(repo_path):
-        for f in files:
-            file_path = os.path.join(root, f)
-            if not is_text_file(f):
-                continue
-            try:
-                size_mb = os.path.getsize(file_path) / (1024*1024)
-                if size_mb > max_file_size_mb:
-                    print(f"⚠️ Skipping large file: {file_path} ({size_mb:.2f} MB)")
-                    continue
-
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as file:
-                    content = file.read().strip()
-                    if content:
-                        code_files.append({"path": file_path, "content": content})
-            except Exception as e:
-                print(f"❌ Failed to read {file_path}: {e}")
-                continue
+    file_paths = []
+    for entry in _iter_files(repo_path):
+        if not is_text_file(entry.name):
+            continue
+        try:
+            size_mb = entry.stat(follow_symlinks=False).st_size / (1024*1024)
+        except OSError as e:
+            print(f"❌ Failed to read {entry.path}: {e}")
+            continue
+        if size_mb > max_file_size_mb:
+            print(f"⚠️ Skipping large file: {entry.path} ({size_mb:.2f} MB)")
+            continue
+        file_paths.append(entry.path)
+
+    # File reads are I/O-bound and release the GIL, so overlap them
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        code_files = [f for f in executor.map(_read_file, file_paths) if f]
 
     print(f"🔍 Total code/text files found: {len(code_files)}")
     return code_files
 
 
-def extract_endpoints_from_code(code_texts: List[str]) -> List[str]:
-    """
-    Detects API endpoints across multiple languages and frameworks:
-      ✅ Python (FastAPI, Flask, Django REST)
-      ✅ JavaScript/TypeScript (Express, Axios, Fetch)
-      ✅ Java/Kotlin (Spring Boot)
-      ✅ Go (Gin, Fiber)
-      ✅ Ruby (Rails)
-      ✅ PHP (Laravel)
-    Returns a list of "METHOD /path".
-    """
-    endpoints = []
-
+# ------------------------------
+# Endpoint patterns
+# ------------------------------
+# Each framework contributes one alternative to a single combined regex, so
+# every file is scanned once. Capture groups are prefixed with the pattern
+# name ("<name>_method", "<name>_path") to keep them unique.
+ENDPOINT_PATTERNS = [
     # Python FastAPI / Flask / Django REST
-    py_pattern = r'@[\w_]+\.(get|post|put|delete|patch)\(["\'`]([^"\'`]+)["\'`]\)'
+    ("py", r'@[\w_]+\.(?P<py_method>get|post|put|delete|patch)\(["\'`](?P<py_path>[^"\'`]+)["\'`]\)'),
 
     # Express.js (variable-agnostic)
-    js_backend_pattern = r'\b\w+\.(get|post|put|delete|patch)\(\s*[\'"`]([^\'"`]+)[\'"`]'
+    ("js", r'\b\w+\.(?P<js_method>get|post|put|delete|patch)\(\s*[\'"`](?P<js_path>[^\'"`]+)[\'"`]'),
 
     # Axios calls
-    axios_pattern = r'axios\.(get|post|put|delete|patch)\(\s*[\'"`]([^\'"`]+)[\'"`]'
+    ("axios", r'axios\.(?P<axios_method>get|post|put|delete|patch)\(\s*[\'"`](?P<axios_path>[^\'"`]+)[\'"`]'),
 
     # Fetch API
-    fetch_pattern = r'fetch\(\s*[\'"`]([^\'"`]+)[\'"`]'
+    ("fetch", r'fetch\(\s*[\'"`](?P<fetch_path>[^\'"`]+)[\'"`]'),
 
     # Java Spring Boot
-    java_pattern = r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\(["\'`]([^"\'`]+)["\'`]\)'
+    ("java", r'@(?P<java_method>Get|Post|Put|Delete|Patch)Mapping\(["\'`](?P<java_path>[^"\'`]+)["\'`]\)'),
 
     # Go (Gin, Fiber)
-    go_pattern = r'\b(router|r|app|api)\.(GET|POST|PUT|DELETE|PATCH)\(["\'`]([^"\'`]+)["\'`]\)'
+    ("go", r'\b(?:router|r|app|api)\.(?P<go_method>GET|POST|PUT|DELETE|PATCH)\(["\'`](?P<go_path>[^"\'`]+)["\'`]\)'),
 
-    # Ruby on Rails (routes.rb)
-    ruby_pattern = r'(get|post|put|delete|patch)\s+[\'"`]([^\'"`]+)[\'"`]'
+    # Ruby on Rails (routes.rb): anchored to the start of a line, so the bare
+    # verb cannot match inside comments or other calls and swallow their span
+    ("ruby", r'^[ \t]*(?P<ruby_method>get|post|put|delete|patch)[ \t]+[\'"`](?P<ruby_path>[^\'"`]+)[\'"`]'),
 
     # PHP Laravel routes
-    php_pattern = r'Route::(get|post|put|delete|patch)\(\s*[\'"`]([^\'"`]+)[\'"`]'
+    ("php", r'Route::(?P<php_method>get|post|put|delete|patch)\(\s*[\'"`](?P<php_path>[^\'"`]+)[\'"`]'),
+]
+
+_COMBINED_ENDPOINT_RE = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in ENDPOINT_PATTERNS),
+    re.ASCII | re.MULTILINE,
+)
+
+
+# Per-pattern regexes, used to pull the method/path groups out of a span
+# that Hyperscan reported (Hyperscan itself does not capture groups).
+_ENDPOINT_RES = {name: re.compile(pattern, re.ASCII | re.MULTILINE) for name, pattern in ENDPOINT_PATTERNS}
+
+
+def _build_hyperscan_db():
+    """Compile all endpoint patterns into one Hyperscan database, or None if unavailable."""
+    if hyperscan is None:
+        return None
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[re.sub(r"\(\?P<\w+>", "(", p).encode() for _, p in ENDPOINT_PATTERNS],
+            ids=list(range(len(ENDPOINT_PATTERNS))),
+            elements=len(ENDPOINT_PATTERNS),
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_MULTILINE] * len(ENDPOINT_PATTERNS),
+        )
+        return db
+    except Exception as e:
+        print(f"⚠️ Hyperscan unavailable, using regex fallback: {e}")
+        return None
+
+
+_HS_DB = _build_hyperscan_db()
+_hs_local = threading.local()
+
+
+def _hs_scratch():
+    """Hyperscan scratch space is not thread-safe, so keep one per thread."""
+    scratch = getattr(_hs_local, "scratch", None)
+    if scratch is None:
+        scratch = _hs_local.scratch = hyperscan.Scratch(_HS_DB)
+    return scratch
+
+
+def _format_endpoint(name: str, m: re.Match) -> str:
+    """Format a pattern match as "METHOD /path"."""
+    if name == "fetch":
+        return f"GET {m.group('fetch_path')}"
+    return f"{m.group(f'{name}_method').upper()} {m.group(f'{name}_path')}"
+
+
+def _on_hyperscan_match(pattern_id, start, end, flags, context):
+    data, found = context
+    name = ENDPOINT_PATTERNS[pattern_id][0]
+    m = _ENDPOINT_RES[name].fullmatch(data[start:end].decode("utf-8", "ignore"))
+    if m:
+        found[_format_endpoint(name, m)] = None
+
+
+def _scan_with_hyperscan(code: str, found: Dict[str, None]) -> None:
+    """Add the endpoints in one file to `found` (an ordered set) using a single Hyperscan DFA pass."""
+    data = code.encode("utf-8", "ignore")
+    _HS_DB.scan(
+        data,
+        match_event_handler=_on_hyperscan_match,
+        context=(data, found),
+        scratch=_hs_scratch(),
+    )
+
+
+def extract_endpoints_from_code(code_texts: List[str]) -> List[str]:
+    """
+    Detects API endpoints across multiple languages and frameworks:
+      ✅ Python (FastAPI, Flask, Django REST)
+      ✅ JavaScript/TypeScript (Express, Axios, Fetch)
+      ✅ Java/Kotlin (Spring Boot)
+      ✅ Go (Gin, Fiber)
+      ✅ Ruby (Rails)
+      ✅ PHP (Laravel)
+    Returns a list of unique "METHOD /path" in order of first appearance.
+    """
+    # Deduplicate while scanning; a dict keeps first-seen order without a sort
+    endpoints = {}
+    scan_re = _COMBINED_ENDPOINT_RE.finditer
 
     for code in code_texts:
-        for pattern, transform in [
-            (py_pattern, lambda m: f"{m[0].upper()} {m[1]}"),
-            (js_backend_pattern, lambda m: f"{m[0].upper()} {m[1]}"),
-            (axios_pattern, lambda m: f"{m[0].upper()} {m[1]}"),
-            (fetch_pattern, lambda m: f"GET {m[0]}"),
-            (java_pattern, lambda m: f"{m[0].replace('Mapping','').upper()} {m[1]}"),
-            (go_pattern, lambda m: f"{m[1].upper()} {m[2]}"),
-            (ruby_pattern, lambda m: f"{m[0].upper()} {m[1]}"),
-            (php_pattern, lambda m: f"{m[0].upper()} {m[1]}")
-        ]:
-            matches = re.findall(pattern, code)
-            endpoints.extend([transform(m) for m in matches])
-
-    # Remove duplicates and normalize paths
-    endpoints = list(set(endpoints))
-    return sorted(endpoints)
+        if _HS_DB is not None:
+            _scan_with_hyperscan(code, endpoints)
+        else:
+            endpoints.update(dict.fromkeys(_format_endpoint(m.lastgroup, m) for m in scan_re(code)))
+
+    return list(endpoints)
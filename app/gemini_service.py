@@ -1,19 +1,83 @@
 import asyncio
+import functools
+import importlib.util
 import os
+import re
+import httpx
 from google import genai
+from google.genai import types
 from dotenv import load_dotenv
-from app.rag_utils import retrieve_rag_context
 
 load_dotenv()
 
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Bump whenever a prompt below changes, so cached AI outputs are not reused
+PROMPT_VERSION = 1
+AI_CACHE_VERSION = f"{GEMINI_MODEL}:prompts-v{PROMPT_VERSION}"
+
+# ------------------------------
+# RAG queries (retrieved in one batch by the caller)
+# ------------------------------
+ENDPOINT_QUERY = "API routes and controllers"
+PROJECT_SUMMARY_QUERY = "Project overview"
+LANGUAGE_SUMMARY_QUERY = "project architecture"
+POM_QUERY = "pom.xml dependencies"
+
 # ------------------------------
 # Gemini API Client
 # ------------------------------
+def _http_client_args():
+    """
+    httpx settings for the Gemini client: a keep-alive pool shared by the
+    concurrent calls, multiplexed over HTTP/2 when the h2 package is installed.
+    """
+    return {
+        "http2": importlib.util.find_spec("h2") is not None,
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=20),
+    }
+
+
+@functools.lru_cache(maxsize=1)
 def get_gemini_client():
+    """Shared Gemini client, created on first use."""
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("🚨 GOOGLE_API_KEY not set in environment!")
-    return genai.Client(api_key=api_key)
+    http_options = types.HttpOptions(
+        client_args=_http_client_args(),
+        async_client_args=_http_client_args(),
+    )
+    return genai.Client(api_key=api_key, http_options=http_options)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True if Gemini rejected the call because the quota was exhausted."""
+    return "RESOURCE_EXHAUSTED" in str(error)
+
+
+# ------------------------------
+# Prompt truncation
+# ------------------------------
+# Rough Gemini average for source code; avoids a network count_tokens call per prompt
+CHARS_PER_TOKEN = 4
+_BLANK_LINES_RE = re.compile(r"\n(?:[ \t]*\n)+")
+_TRAILING_WS_RE = re.compile(r"[ \t]+\n")
+
+
+def head_tokens(text: str, max_tokens: int) -> str:
+    """
+    Return roughly the first `max_tokens` tokens of `text` for a prompt.
+    Blank lines and trailing whitespace are dropped first so the budget goes to
+    code, and the cut is made at a line boundary where possible.
+    """
+    text = _BLANK_LINES_RE.sub("\n", _TRAILING_WS_RE.sub("\n", text))
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars]
+    cut = head.rfind("\n")
+    return head[:cut] if cut > 0 else head
 
 
 # ------------------------------
@@ -36,13 +100,13 @@ RAG Context:
 
 File Name: {file_name}
 Code:
-{code_content[:3000]}
+{head_tokens(code_content, 750)}
 """
 
     try:
         response = await asyncio.to_thread(
             client.models.generate_content,
-            model="gemini-2.0-flash",
+            model=GEMINI_MODEL,
             contents=prompt
         )
 
@@ -110,13 +174,12 @@ Code:
 # ------------------------------
 # Generate AI project summary
 # ------------------------------
-def generate_ai_project_summary(endpoints, vectordb):
-    """Generate a concise project summary using RAG context."""
+def generate_ai_project_summary(endpoints, rag_context):
+    """Generate a concise project summary using RAG context (see PROJECT_SUMMARY_QUERY)."""
     try:
         client = get_gemini_client()
 
         endpoint_text = "\n".join(endpoints[:10])
-        rag_context = retrieve_rag_context(vectordb, query="Project overview", k=5)
 
         prompt = f"""
 You are a software architect assistant.
@@ -132,7 +195,7 @@ Endpoints:
 {endpoint_text}
 """
         response = client.models.generate_content(
-            model="gemini-2.0-flash",
+            model=GEMINI_MODEL,
             contents=prompt
         )
 
@@ -147,6 +210,8 @@ Endpoints:
         return content.strip() if content else "⚠️ Summary generation returned empty content."
 
     except Exception as e:
+        if is_rate_limit_error(e):
+            raise  # let the caller back off and retry
         return f"⚠️ Summary generation failed: {e}"
 
 
@@ -205,14 +270,13 @@ Endpoints:
 
 
 
-def generate_ai_endpoint_explanations(endpoints, vectordb):
-    """Explain each API endpoint in human-readable form using RAG context."""
+def generate_ai_endpoint_explanations(endpoints, rag_context):
+    """Explain each API endpoint in human-readable form using RAG context (see ENDPOINT_QUERY)."""
     if not endpoints:
         return [{"note": "⚠️ No endpoints found in the project."}]
 
     try:
         client = get_gemini_client()
-        rag_context = retrieve_rag_context(vectordb, query="API routes and controllers", k=5)
         endpoint_text = "\n".join(endpoints[:50])  # limit for efficiency
 
         # Prompt for JSON output with explanation per endpoint
@@ -232,7 +296,7 @@ def generate_ai_endpoint_explanations(endpoints, vectordb):
         )
 
         response = client.models.generate_content(
-            model="gemini-2.0-flash",
+            model=GEMINI_MODEL,
             contents=prompt
         )
 
@@ -252,6 +316,8 @@ def generate_ai_endpoint_explanations(endpoints, vectordb):
             return [{"endpoint": ep, "endpoint_explanation_text": text} for ep in endpoints]
 
     except Exception as e:
+        if is_rate_limit_error(e):
+            raise  # let the caller back off and retry
         return [{"endpoint": ep, "endpoint_explanation_text": f"⚠️ Endpoint explanation failed: {e}"} for ep in endpoints]
 
 
@@ -259,12 +325,11 @@ def generate_ai_endpoint_explanations(endpoints, vectordb):
 # ------------------------------
 # Generate AI Language Summary (Frontend / Backend / Fullstack)
 # ------------------------------
-def generate_ai_language_summary(languages, framework, code_texts, vectordb):
-    """Use AI to classify project type (frontend, backend, full stack) and explain it."""
+def generate_ai_language_summary(languages, framework, code_texts, rag_context):
+    """Use AI to classify project type (frontend, backend, full stack) and explain it (see LANGUAGE_SUMMARY_QUERY)."""
     try:
         client = get_gemini_client()
-        rag_context = retrieve_rag_context(vectordb, query="project architecture", k=5)
-        sample_code = "\n".join(code_texts[:3])[:2000]
+        sample_code = head_tokens("\n".join(code_texts[:3]), 500)
 
         prompt = f"""
 You are a software architect.
@@ -283,7 +348,7 @@ Explain briefly what kind of project this is, what its layers do, and which tech
 """
 
         response = client.models.generate_content(
-            model="gemini-2.0-flash",
+            model=GEMINI_MODEL,
             contents=prompt
         )
         candidate = response.candidates[0]
@@ -291,17 +356,18 @@ Explain briefly what kind of project this is, what its layers do, and which tech
         return text.strip()
 
     except Exception as e:
+        if is_rate_limit_error(e):
+            raise  # let the caller back off and retry
         return f"⚠️ Language summary generation failed: {e}"
 
 
 # ------------------------------
 # Generate AI pom.xml Explanation
 # ------------------------------
-def generate_ai_pom_explanation(pom_content, vectordb):
-    """Explain Maven pom.xml file, dependencies, and version info."""
+def generate_ai_pom_explanation(pom_content, rag_context):
+    """Explain Maven pom.xml file, dependencies, and version info (see POM_QUERY)."""
     try:
         client = get_gemini_client()
-        rag_context = retrieve_rag_context(vectordb, query="pom.xml dependencies", k=5)
 
         prompt = f"""
 You are a Java build expert.
@@ -315,11 +381,11 @@ RAG Context:
 {rag_context}
 
 pom.xml:
-{pom_content[:6000]}
+{head_tokens(pom_content, 1500)}
 """
 
         response = client.models.generate_content(
-            model="gemini-2.0-flash",
+            model=GEMINI_MODEL,
             contents=prompt
         )
 
@@ -328,5 +394,7 @@ pom.xml:
         return text.strip()
 
     except Exception as e:
+        if is_rate_limit_error(e):
+            raise  # let the caller back off and retry
         return f"⚠️ pom.xml explanation failed: {e}"
 
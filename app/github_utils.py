@@ -3,9 +3,17 @@ import git
 import tempfile
 import os
 
+# Clone options: only the latest commit of the default branch; blobs are fetched on checkout
+CLONE_OPTIONS = ["--depth=1", "--filter=blob:none", "--single-branch", "--no-checkout"]
+
+# Heavy directories that are never analyzed (non-cone sparse-checkout patterns)
+SPARSE_CHECKOUT_PATTERNS = ["/*", "!node_modules/", "!dist/", "!build/"]
+
 def clone_github_repo(repo_url: str) -> str:
     """
     Clones the given GitHub repository into a temporary directory.
+    Uses a shallow, partial clone and skips heavy directories (node_modules,
+    dist, build) so only the current source tree is downloaded.
     
     Args:
         repo_url (str): GitHub repository URL.
@@ -14,5 +22,11 @@ def clone_github_repo(repo_url: str) -> str:
         str: Path to the cloned repository.
     """
     temp_dir = tempfile.mkdtemp()
-    git.Repo.clone_from(repo_url, temp_dir)
+    repo = git.Repo.clone_from(repo_url, temp_dir, multi_options=CLONE_OPTIONS)
+    try:
+        repo.git.sparse_checkout("set", "--no-cone", *SPARSE_CHECKOUT_PATTERNS)
+    except git.GitCommandError as e:
+        # Older git without sparse-checkout: fall back to checking out everything
+        print(f"⚠️ Sparse checkout unavailable, checking out full tree: {e}")
+    repo.git.checkout()
     return temp_dir
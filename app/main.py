@@ -113,19 +113,35 @@ import os
 # ✅ Prevent Hugging Face tokenizers warning
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
+import asyncio
+import random
+import re
 import shutil
 from fastapi import FastAPI, Form
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.github_utils import clone_github_repo
-from app.code_parser import extract_code_files, extract_endpoints_from_code
-from app.rag_utils import create_rag_vectorstore
+from app.code_parser import extract_code_files, extract_endpoints_from_code, get_file_extension, ENDPOINT_PATTERNS
+from app.rag_utils import (
+    create_rag_vectorstore,
+    dump_rag_vectorstore,
+    load_rag_vectorstore,
+    retrieve_rag_contexts,
+    EMBEDDING_MODEL
+)
+from app.cache_utils import content_hash, cache_get, cache_set, cache_get_json, cache_set_json
 from app.gemini_service import (
     # generate_ai_suggestions_async,
     generate_ai_project_summary,
     generate_ai_endpoint_explanations,
     generate_ai_language_summary,
-    generate_ai_pom_explanation
+    generate_ai_pom_explanation,
+    is_rate_limit_error,
+    AI_CACHE_VERSION,
+    ENDPOINT_QUERY,
+    PROJECT_SUMMARY_QUERY,
+    LANGUAGE_SUMMARY_QUERY,
+    POM_QUERY
 )
 
 # ------------------------------------------------------------------
@@ -143,39 +159,84 @@ app.add_middleware(
 # ------------------------------------------------------------------
 # Helper Functions
 # ------------------------------------------------------------------
+# Extension -> language, in the order languages are reported
+LANGUAGE_EXTENSIONS = {
+    "Python": {".py"},
+    "TypeScript/JavaScript": {".ts", ".tsx", ".js", ".jsx"},
+    "Java": {".java"},
+    "PHP": {".php"},
+    "C#": {".cs"},
+}
+
+# Framework keywords, looked up in file paths and in the first 1000 chars of each file
+_PATH_FRAMEWORK_RE = re.compile(r"angular|component|react")
+_CODE_FRAMEWORK_RE = re.compile(r"flask|springboot|@restcontroller|express")
+
+# (framework, keywords) in priority order: the first framework with a hit wins
+FRAMEWORK_KEYWORDS = [
+    ("Angular", {"angular", "component"}),
+    ("React", {"react"}),
+    ("Flask", {"flask"}),
+    ("Spring Boot", {"springboot", "@restcontroller"}),
+    ("Express.js", {"express"}),
+]
+
+
 def classify_project_from_files(code_files):
     """Detects primary languages and framework from file structure and content."""
-    combined_paths = " ".join([f["path"].lower() for f in code_files])
-    combined_code = " ".join([f["content"].lower()[:1000] for f in code_files])
-    languages, framework = [], "Unknown"
-
-    # Detect languages
-    if ".py" in combined_paths:
-        languages.append("Python")
-    if ".ts" in combined_paths or ".js" in combined_paths:
-        languages.append("TypeScript/JavaScript")
-    if ".java" in combined_paths:
-        languages.append("Java")
-    if ".php" in combined_paths:
-        languages.append("PHP")
-    if ".cs" in combined_paths:
-        languages.append("C#")
-
-    # Detect frameworks
-    if "angular" in combined_paths or "component" in combined_paths:
-        framework = "Angular"
-    elif "react" in combined_paths:
-        framework = "React"
-    elif "flask" in combined_code:
-        framework = "Flask"
-    elif "springboot" in combined_code or "@restcontroller" in combined_code:
-        framework = "Spring Boot"
-    elif "express" in combined_code:
-        framework = "Express.js"
+    exts, keywords, seen_dirs = set(), set(), set()
+    top_keywords = FRAMEWORK_KEYWORDS[0][1]
+
+    # Single pass over the files: collect extensions and framework keyword hits
+    for f in code_files:
+        directory, filename = os.path.split(f["path"].lower())
+        exts.add(get_file_extension(filename))
+        if keywords & top_keywords:
+            continue  # highest-priority framework already found, only languages left
+        # Keywords never contain "/", so each directory only needs scanning once
+        if directory not in seen_dirs:
+            seen_dirs.add(directory)
+            keywords.update(_PATH_FRAMEWORK_RE.findall(directory))
+        keywords.update(_PATH_FRAMEWORK_RE.findall(filename))
+        keywords.update(_CODE_FRAMEWORK_RE.findall(f["content"][:1000].lower()))
+
+    languages = [lang for lang, lang_exts in LANGUAGE_EXTENSIONS.items() if exts & lang_exts]
+    framework = next((name for name, words in FRAMEWORK_KEYWORDS if keywords & words), "Unknown")
 
     return {"languages": languages or ["Unknown"], "framework": framework}
 
 
+async def call_with_retry(func, *args, fallback, attempts=3):
+    """
+    Run a blocking Gemini call in a worker thread, retrying rate-limit errors
+    with exponential backoff (2s, 4s, ... plus jitter) without blocking the event loop.
+    """
+    for attempt in range(attempts):
+        try:
+            return await asyncio.to_thread(func, *args)
+        except Exception as e:
+            if not is_rate_limit_error(e):
+                raise
+            if attempt < attempts - 1:
+                delay = 2 ** (attempt + 1) + random.random()
+                print(f"⚠️ Attempt {attempt+1} failed: rate limit hit. Retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+    # If all attempts failed
+    return fallback
+
+
+def is_failed_ai_result(result):
+    """True for the "⚠️ ..." warning outputs, which must not be cached."""
+    if isinstance(result, str):
+        return result.startswith("⚠️")
+    if isinstance(result, list):
+        return any(
+            isinstance(item, dict) and any(isinstance(v, str) and v.startswith("⚠️") for v in item.values())
+            for item in result
+        )
+    return False
+
+
 def get_relative_path(file_path, repo_name):
     """Normalize file paths for readability in response."""
     if repo_name in file_path:
@@ -207,18 +268,23 @@ async def generate_docs(git_url: str = Form(...)):
         return {"status": "error", "message": "No code files found in repo."}
 
     # --- Filter source files ---
-    allowed_exts = (".py", ".js", ".ts", ".jsx", ".java", ".kt", ".c", ".cpp", ".php", ".rb")
-    filtered_files = [f for f in code_files if f["path"].endswith(allowed_exts)]
+    allowed_exts = {".py", ".js", ".ts", ".jsx", ".java", ".kt", ".c", ".cpp", ".php", ".rb"}
+    filtered_files = [f for f in code_files if get_file_extension(f["path"]) in allowed_exts]
     if not filtered_files:
         shutil.rmtree(repo_path)
         return {"status": "error", "message": "No source code files found for analysis."}
 
-    # --- Create RAG vectorstore ---
-    vectordb = create_rag_vectorstore([f["content"] for f in filtered_files])
+    # Repeated runs on unchanged sources reuse cached results (see app/cache_utils.py)
+    contents = [f["content"] for f in filtered_files]
+    repo_key = content_hash(contents)
 
     # --- Extract API endpoints ---
-    endpoints = extract_endpoints_from_code([f["content"] for f in filtered_files])
-    endpoint_explanations = generate_ai_endpoint_explanations(endpoints, vectordb)
+    # Keyed on the pattern set too, so editing a pattern invalidates old results
+    endpoints_key = f"endpoints:{content_hash([p for _, p in ENDPOINT_PATTERNS])}:{repo_key}"
+    endpoints = cache_get_json(endpoints_key)
+    if endpoints is None:
+        endpoints = extract_endpoints_from_code(contents)
+        cache_set_json(endpoints_key, endpoints)
 
     # --- Generate AI suggestions with RAG context ---
     # suggestions = await generate_ai_suggestions_async(filtered_files, vectordb)
@@ -229,42 +295,99 @@ async def generate_docs(git_url: str = Form(...)):
     # --- Classify project type ---
     project_info = classify_project_from_files(filtered_files)
 
-    # ✅ Add retry logic for rate limits
-    import time
-    for attempt in range(3):  # Try up to 3 times
-        try:
-            language_summary = generate_ai_language_summary(
-                project_info["languages"],
-                project_info["framework"],
-                [f["content"] for f in filtered_files],
-                vectordb
-            )
-            break  # success → exit loop
-        except Exception as e:
-            if "RESOURCE_EXHAUSTED" in str(e):
-                print(f"⚠️ Attempt {attempt+1} failed: rate limit hit. Retrying in 30s...")
-                time.sleep(30)
-            else:
-                raise
-    else:
-        # If all 3 attempts failed
-        language_summary = "⚠️ AI summary temporarily unavailable (rate limit). Try again later."
-
-
-    # --- AI project summary ---
-    ai_summary = generate_ai_project_summary(endpoints, vectordb)
-
-    # --- pom.xml analysis ---
+    # --- Read pom.xml (for Java projects) ---
     pom_path = next((f["path"] for f in code_files if f["path"].endswith("pom.xml")), None)
-    pom_explanation = None
+    pom_content, pom_explanation = None, None
     if pom_path:
         try:
             with open(pom_path, "r", encoding="utf-8", errors="ignore") as pom_file:
                 pom_content = pom_file.read()
-            pom_explanation = generate_ai_pom_explanation(pom_content, vectordb)
         except Exception as e:
             pom_explanation = f"⚠️ Failed to analyze pom.xml: {e}"
 
+    # --- Reuse cached AI outputs; each one is cached separately ---
+    # Prompts also embed the extracted endpoints and RAG context from EMBEDDING_MODEL
+    ai_key = content_hash(contents + [pom_content or "", EMBEDDING_MODEL, *endpoints])
+    rag_queries = {
+        "endpoint_explanations": ENDPOINT_QUERY,
+        "language_summary": LANGUAGE_SUMMARY_QUERY,
+        "ai_summary": PROJECT_SUMMARY_QUERY,
+    }
+    if pom_content is not None:
+        rag_queries["pom_explanation"] = POM_QUERY
+    ai_cache_keys = {name: f"{name}:{AI_CACHE_VERSION}:{ai_key}" for name in rag_queries}
+    # The language summary prompt also gets the detected stack, which depends on file paths
+    stack_key = content_hash([ai_key, project_info["framework"], *project_info["languages"]])
+    ai_cache_keys["language_summary"] = f"language_summary:{AI_CACHE_VERSION}:{stack_key}"
+    ai_results = {name: cache_get_json(ai_cache_keys[name]) for name in rag_queries}
+    missing = [name for name, result in ai_results.items() if result is None]
+
+    if missing:
+        # --- Create (or reload) RAG vectorstore ---
+        # Cached as raw FAISS index bytes + JSON chunk texts, so nothing is unpickled
+        faiss_key = f"{EMBEDDING_MODEL}:{repo_key}"
+        index_bytes = cache_get(f"faiss-index:{faiss_key}")
+        chunks = cache_get_json(f"faiss-chunks:{faiss_key}")
+        if index_bytes is not None and chunks is not None:
+            vectordb = load_rag_vectorstore(index_bytes, chunks)
+        else:
+            vectordb = create_rag_vectorstore(contents)
+            index_bytes, chunks = dump_rag_vectorstore(vectordb)
+            cache_set(f"faiss-index:{faiss_key}", index_bytes)
+            cache_set_json(f"faiss-chunks:{faiss_key}", chunks)
+
+        # --- Retrieve the needed RAG contexts in one batch ---
+        contexts = dict(zip(missing, retrieve_rag_contexts(vectordb, [rag_queries[n] for n in missing], k=5)))
+
+        # --- Run the independent Gemini calls concurrently ---
+        rate_limited = "temporarily unavailable (rate limit). Try again later."
+        calls = {
+            "endpoint_explanations": lambda: call_with_retry(
+                generate_ai_endpoint_explanations, endpoints, contexts["endpoint_explanations"],
+                fallback=[{"endpoint": ep, "endpoint_explanation_text": f"⚠️ Explanation {rate_limited}"} for ep in endpoints]
+            ),
+            "language_summary": lambda: call_with_retry(
+                generate_ai_language_summary,
+                project_info["languages"],
+                project_info["framework"],
+                contents,
+                contexts["language_summary"],
+                fallback=f"⚠️ AI summary {rate_limited}"
+            ),
+            "ai_summary": lambda: call_with_retry(
+                generate_ai_project_summary, endpoints, contexts["ai_summary"],
+                fallback=f"⚠️ Project summary {rate_limited}"
+            ),
+            "pom_explanation": lambda: call_with_retry(
+                generate_ai_pom_explanation, pom_content, contexts["pom_explanation"],
+                fallback=f"⚠️ pom.xml explanation {rate_limited}"
+            ),
+        }
+        results = await asyncio.gather(*(calls[name]() for name in missing), return_exceptions=True)
+
+        failure_messages = {
+            "language_summary": "⚠️ Language summary generation failed: {}",
+            "ai_summary": "⚠️ Summary generation failed: {}",
+            "pom_explanation": "⚠️ Failed to analyze pom.xml: {}",
+        }
+        for name, result in zip(missing, results):
+            if isinstance(result, Exception):
+                if name == "endpoint_explanations":
+                    result = [
+                        {"endpoint": ep, "endpoint_explanation_text": f"⚠️ Endpoint explanation failed: {result}"}
+                        for ep in endpoints
+                    ]
+                else:
+                    result = failure_messages[name].format(result)
+            elif not is_failed_ai_result(result):
+                cache_set_json(ai_cache_keys[name], result)
+            ai_results[name] = result
+
+    endpoint_explanations = ai_results["endpoint_explanations"]
+    language_summary = ai_results["language_summary"]
+    ai_summary = ai_results["ai_summary"]
+    pom_explanation = ai_results.get("pom_explanation", pom_explanation)
+
     # --- Cleanup cloned repo ---
     shutil.rmtree(repo_path)
 
@@ -277,7 +400,7 @@ async def generate_docs(git_url: str = Form(...)):
             "framework": project_info["framework"],
             "ai_language_summary": language_summary,
         },
-        "endpoints": endpoints,
+        "endpoints": sorted(endpoints),
         "endpoint_explanations": endpoint_explanations,
         "ai_project_summary": ai_summary,
         "pom_explanation": pom_explanation,
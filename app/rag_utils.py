@@ -1,28 +1,83 @@
+import functools
+import hashlib
 import os
-from langchain_community.vectorstores import Chroma
+import faiss
+import numpy as np
+import torch
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langchain_huggingface import HuggingFaceEmbeddings
 
-CHROMA_PATH = "./chroma_db"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+@functools.lru_cache(maxsize=1)
+def _get_embedder():
+    """
+    Shared MiniLM embedder: FP16 on GPU, larger encode batches, normalized vectors.
+    Loaded once per process; the model is stateless for inference.
+    """
+    if torch.cuda.is_available():
+        model_kwargs = {"device": "cuda", "model_kwargs": {"torch_dtype": torch.float16}}
+    else:
+        # FP16 matmuls are slow or unsupported on most CPUs, keep FP32 there
+        model_kwargs = {"device": "cpu"}
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs=model_kwargs,
+        encode_kwargs={"batch_size": 128, "normalize_embeddings": True},
+    )
+
+def dedupe_documents(docs: list):
+    """Drop chunks whose content is identical to an earlier one (license headers, repeated boilerplate)."""
+    seen = set()
+    unique_docs = []
+    for d in docs:
+        h = hashlib.blake2b(d.page_content.encode("utf-8", "ignore"), digest_size=8).digest()
+        if h not in seen:
+            seen.add(h)
+            unique_docs.append(d)
+    return unique_docs
 
 def create_rag_vectorstore(code_texts: list):
     """Create embeddings for repo code files."""
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1200, chunk_overlap=200)
     docs = [Document(page_content=t) for t in code_texts]
     split_docs = text_splitter.split_documents(docs)
+    unique_docs = dedupe_documents(split_docs)
 
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vectordb = Chroma.from_documents(split_docs, embeddings, persist_directory=CHROMA_PATH)
-    # vectordb.persist()
+    embeddings = _get_embedder()
+    # In-memory index: the store only lives for one request, so nothing is persisted
+    vectordb = FAISS.from_documents(unique_docs, embeddings)
     return vectordb
 
-def load_rag_vectorstore():
-    """Load existing vector DB."""
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    return Chroma(persist_directory=CHROMA_PATH, embedding_function=embeddings)
+def dump_rag_vectorstore(vectordb):
+    """
+    Split a vectorstore into raw FAISS index bytes and its chunk texts (in index order),
+    so it can be cached without pickling.
+    """
+    index_bytes = faiss.serialize_index(vectordb.index).tobytes()
+    chunks = [
+        vectordb.docstore.search(vectordb.index_to_docstore_id[i]).page_content
+        for i in range(vectordb.index.ntotal)
+    ]
+    return index_bytes, chunks
+
+def load_rag_vectorstore(index_bytes: bytes, chunks: list):
+    """Rebuild a vectorstore from dump_rag_vectorstore() output."""
+    index = faiss.deserialize_index(np.frombuffer(index_bytes, dtype=np.uint8))
+    ids = [str(i) for i in range(len(chunks))]
+    docstore = InMemoryDocstore({doc_id: Document(page_content=t) for doc_id, t in zip(ids, chunks)})
+    return FAISS(_get_embedder(), index, docstore, dict(enumerate(ids)))
 
-def retrieve_rag_context(vectordb, query: str, k: int = 5):
-    """Retrieve top-k relevant chunks from vectorstore."""
-    results = vectordb.similarity_search(query, k=k)
-    return "\n\n".join([r.page_content for r in results])
\ No newline at end of file
+def retrieve_rag_contexts(vectordb, queries: list, k: int = 5):
+    """Retrieve top-k chunks for several queries with one embedding batch and one search."""
+    query_embeddings = np.asarray(vectordb.embeddings.embed_documents(queries), dtype=np.float32)
+    _, indices = vectordb.index.search(query_embeddings, k)
+    contexts = []
+    for row in indices:
+        # FAISS pads with -1 when the index holds fewer than k vectors
+        docs = [vectordb.docstore.search(vectordb.index_to_docstore_id[i]) for i in row if i != -1]
+        contexts.append("\n\n".join(d.page_content for d in docs))
+    return contexts